@@ -0,0 +1,388 @@
+import glob
+import hashlib
+import json
+import os
+import zlib
+from contextlib import ExitStack
+from datetime import datetime, time, timezone
+
+from changelog import reset_origin
+
+# ---------------------------
+# Incremental backups
+# ---------------------------
+# backups/
+#   objects/ab/ab12...   zlib-compressed chunk, named by sha256 of its content
+#   snapshots/<id>.json  file name -> size, mtime, inode, head/root hashes and ordered chunk list
+#
+# A chunk is only written once no matter how many snapshots use it, so a
+# daily backup stores just the chunks that changed since the last one. File
+# names are kept relative to the working folder and always restored under a
+# target folder.
+
+BACKUP_DIR = "backups"
+
+# Ledger files written by the app (app.py, utils.py, data.py) and the sync change
+# log. The sync instance.json is left out on purpose: see restore().
+SOURCES = ["data.csv", "NANI_ASSOCIATES_DAILY_TRACKER.xlsx", "data/*.csv", "data_sync/*.jsonl"]
+LEDGERS = ["data.csv"]
+
+MIN_CHUNK = 4 * 1024
+MAX_CHUNK = 256 * 1024
+FIXED_CHUNK = 64 * 1024
+HEAD_SIZE = 4 * 1024
+
+
+class BackupError(Exception):
+    pass
+
+
+# ---------------------------
+# Chunking
+# ---------------------------
+def _chunk_lines(data):
+    """Cut text files after lines whose checksum hits the boundary mask.
+
+    Boundaries depend on line content, not position, so inserting or deleting
+    a row only changes the chunk around it.
+    """
+    start = pos = 0
+    while pos < len(data):
+        end = data.find(b"\n", pos)
+        end = len(data) if end == -1 else end + 1
+        line = data[pos:end]
+        pos = end
+        size = pos - start
+        if size >= MAX_CHUNK or (size >= MIN_CHUNK and zlib.crc32(line) & 0xFF == 0):
+            yield data[start:pos]
+            start = pos
+    if start < len(data):
+        yield data[start:]
+
+
+def _chunk_fixed(data):
+    for i in range(0, len(data), FIXED_CHUNK):
+        yield data[i:i + FIXED_CHUNK]
+
+
+def _chunker(name):
+    return _chunk_lines if name.lower().endswith((".csv", ".txt", ".jsonl")) else _chunk_fixed
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# ---------------------------
+# Object store
+# ---------------------------
+def _object_path(backup_dir, digest):
+    return os.path.join(backup_dir, "objects", digest[:2], digest)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _put_chunk(backup_dir, data, stats):
+    digest = _digest(data)
+    path = _object_path(backup_dir, digest)
+    if not os.path.exists(path):
+        _write_atomic(path, zlib.compress(data, 6))
+        stats["chunks_written"] += 1
+        stats["bytes_written"] += len(data)
+    return [digest, len(data)]
+
+
+def _get_chunk(backup_dir, digest):
+    try:
+        with open(_object_path(backup_dir, digest), "rb") as f:
+            data = zlib.decompress(f.read())
+    except FileNotFoundError:
+        raise BackupError(f"Missing chunk {digest}")
+    except zlib.error:
+        raise BackupError(f"Corrupt chunk {digest}")
+    if _digest(data) != digest:
+        raise BackupError(f"Chunk {digest} does not match its hash")
+    return data
+
+
+# ---------------------------
+# Snapshots
+# ---------------------------
+def list_snapshots(backup_dir=BACKUP_DIR):
+    folder = os.path.join(backup_dir, "snapshots")
+    if not os.path.isdir(folder):
+        return []
+    return sorted(name[:-5] for name in os.listdir(folder) if name.endswith(".json"))
+
+
+def load_snapshot(snapshot_id, backup_dir=BACKUP_DIR):
+    path = os.path.join(backup_dir, "snapshots", f"{snapshot_id}.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise BackupError(f"No snapshot {snapshot_id}")
+
+
+def _safe_name(name):
+    """Reject names that would land outside the folder they are restored into."""
+    name = os.path.normpath(name)
+    if os.path.isabs(name) or name == ".." or name.startswith(".." + os.sep):
+        raise BackupError(f"{name} is outside the working folder")
+    return name
+
+
+def _source_files(sources):
+    files = []
+    for pattern in sources:
+        files.extend(sorted(glob.glob(pattern)))
+    return list(dict.fromkeys(_safe_name(os.path.relpath(f)) for f in files if os.path.isfile(f)))
+
+
+def _root(chunks):
+    """Hash of the chunk list. Chunk boundaries depend only on content, so
+    this identifies the file's content too."""
+    return _digest("".join(h for h, _ in chunks).encode())
+
+
+def _read_appended(name, previous, backup_dir, stats):
+    """Chunks for a text file that has only grown since the previous snapshot.
+
+    The start of the file (the CSV header) and the previous last chunk must
+    still read back the same; only the last chunk and what follows it are
+    read. Returns None when the file was changed some other way.
+    """
+    chunks = previous["chunks"]
+    tail_digest, tail_size = chunks[-1]
+    with open(name, "rb") as f:
+        head = f.read(HEAD_SIZE)
+        f.seek(previous["size"] - tail_size)
+        data = f.read()
+    if _digest(head) != previous["head"] or _digest(data[:tail_size]) != tail_digest:
+        return None
+    stats["files_appended"] += 1
+    stats["bytes_read"] += len(head) + len(data)
+    # The last chunk started on a boundary, so chunking on from there cuts
+    # the same chunks as chunking the whole file
+    return chunks[:-1] + [_put_chunk(backup_dir, c, stats) for c in _chunk_lines(data)]
+
+
+def _chunk_file(name, backup_dir, previous, full, stats):
+    """Return (chunks, head hash) for one file, reading as little as possible.
+
+    - size and mtime unchanged since the previous snapshot: not read at all
+    - a CSV/JSONL file that was only appended to (same file, see
+      _read_appended): only the new part is read
+    - anything else: read in full
+
+    Ledger rewrites always replace the file (utils.save_data), so they never
+    pass for an append. Only chunks that are not stored yet are written.
+    """
+    st = os.stat(name)
+    if not full and previous and previous.get("ino") == st.st_ino:
+        if previous["size"] == st.st_size and previous["mtime_ns"] == st.st_mtime_ns:
+            stats["files_unchanged"] += 1
+            return previous["chunks"], previous["head"]
+        if (_chunker(name) is _chunk_lines and previous["chunks"]
+                and st.st_size >= previous["size"]):
+            chunks = _read_appended(name, previous, backup_dir, stats)
+            if chunks is not None:
+                return chunks, previous["head"]
+
+    with open(name, "rb") as f:
+        data = f.read()
+    stats["files_rescanned"] += 1
+    stats["bytes_read"] += len(data)
+    return [_put_chunk(backup_dir, c, stats) for c in _chunker(name)(data)], _digest(data[:HEAD_SIZE])
+
+
+def create_snapshot(sources=SOURCES, backup_dir=BACKUP_DIR, full=False, ledgers=LEDGERS):
+    """Back up the ledger files and return (snapshot_id, stats).
+
+    Unchanged files are not read and appended ones are read from where the
+    previous snapshot ended (see _chunk_file); pass full=True to re-read
+    everything. The ledgers are locked meanwhile so a save can't land
+    half-way through.
+    """
+    from ledger_core import ledger_lock
+
+    with ExitStack() as stack:
+        for ledger in ledgers:
+            if os.path.exists(ledger):
+                stack.enter_context(ledger_lock(ledger))
+        return _create_snapshot(sources, backup_dir, full)
+
+
+def _create_snapshot(sources, backup_dir, full):
+    snapshots = list_snapshots(backup_dir)
+    previous = load_snapshot(snapshots[-1], backup_dir)["files"] if snapshots else {}
+
+    stats = {
+        "files_unchanged": 0, "files_appended": 0, "files_rescanned": 0,
+        "bytes_read": 0, "chunks_written": 0, "bytes_written": 0
+    }
+    files = {}
+    for name in _source_files(sources):
+        st = os.stat(name)
+        chunks, head = _chunk_file(name, backup_dir, previous.get(name), full, stats)
+        files[name] = {
+            "size": sum(size for _, size in chunks),
+            "mtime_ns": st.st_mtime_ns,
+            "ino": st.st_ino,
+            "head": head,
+            "root": _root(chunks),
+            "chunks": chunks
+        }
+
+    created = datetime.now(timezone.utc)
+    snapshot_id = created.strftime("%Y%m%dT%H%M%S%fZ")
+    manifest = {"id": snapshot_id, "created": created.isoformat(), "files": files}
+    _write_atomic(
+        os.path.join(backup_dir, "snapshots", f"{snapshot_id}.json"),
+        json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+    )
+    return snapshot_id, stats
+
+
+def _snapshot_id(moment):
+    return moment.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def find_snapshot(at=None, backup_dir=BACKUP_DIR):
+    """Latest snapshot, or the latest one taken at or before `at`.
+
+    `at` is an ISO date or date/time in local time unless it has an offset; a
+    bare date means the end of that day.
+    """
+    snapshots = list_snapshots(backup_dir)
+    if at is not None:
+        text = str(at)
+        try:
+            cutoff = datetime.fromisoformat(text)
+        except ValueError:
+            raise BackupError(f"Invalid date/time {text!r}, expected YYYY-MM-DD or YYYY-MM-DDTHH:MM")
+        if len(text) == 10:
+            cutoff = datetime.combine(cutoff.date(), time.max)
+        # Snapshot ids are UTC timestamps, so they sort and compare as strings
+        snapshots = [s for s in snapshots if s <= _snapshot_id(cutoff)]
+    if not snapshots:
+        raise BackupError("No snapshot found")
+    return snapshots[-1]
+
+
+def _assemble(entry, backup_dir):
+    if _root(entry["chunks"]) != entry["root"]:
+        raise BackupError("chunk list does not match root hash")
+    data = b"".join(_get_chunk(backup_dir, digest) for digest, _ in entry["chunks"])
+    if len(data) != entry["size"]:
+        raise BackupError(f"restored {len(data)} bytes, expected {entry['size']}")
+    if "sha256" in entry and _digest(data) != entry["sha256"]:
+        raise BackupError("restored content does not match the file's sha256")  # older snapshots
+    return data
+
+
+def restore(snapshot_id, target_dir, backup_dir=BACKUP_DIR, files=None, overwrite_live=False,
+            ledgers=LEDGERS):
+    """Rebuild the files of a snapshot under target_dir, checking every chunk.
+
+    Restoring into the working folder replaces the live books, so it needs
+    overwrite_live=True. A restored change log gets a fresh instance id (see
+    changelog.reset_origin), because other offices have already seen the
+    sequence numbers it would otherwise reuse. The ledgers are locked while
+    they and their change logs are written, so a running app can't save in
+    between.
+    """
+    from ledger_core import ledger_lock
+
+    if os.path.realpath(target_dir) == os.path.realpath(os.getcwd()) and not overwrite_live:
+        raise BackupError("Restoring into the working folder would overwrite the live books")
+    snapshot = load_snapshot(snapshot_id or find_snapshot(backup_dir=backup_dir), backup_dir)
+
+    # Check and rebuild everything before writing anything
+    contents = {}
+    for name, entry in snapshot["files"].items():
+        if files and name not in files:
+            continue
+        try:
+            contents[_safe_name(name)] = _assemble(entry, backup_dir)
+        except BackupError as e:
+            raise BackupError(f"{name}: {e}")
+
+    synced = []
+    for name in contents:
+        folder, base = os.path.split(name)
+        if base == "changelog.jsonl" and folder.endswith("_sync"):
+            synced.append(os.path.normpath(os.path.join(target_dir, folder[:-len("_sync")] + ".csv")))
+    locked = dict.fromkeys(synced + [os.path.normpath(os.path.join(target_dir, l)) for l in ledgers])
+
+    with ExitStack() as stack:
+        for ledger in locked:
+            stack.enter_context(ledger_lock(ledger))
+        for name, data in contents.items():
+            _write_atomic(os.path.join(target_dir, name), data)
+        for ledger in synced:
+            reset_origin(ledger)
+    return list(contents)
+
+
+def verify(backup_dir=BACKUP_DIR, deep=False, live=False):
+    """Check backups and return a list of problems (empty when all is well).
+
+    Every chunk of every snapshot is checked against its hash. Files of the
+    latest snapshot (of all snapshots with deep=True) are rebuilt and checked
+    against their size. With live=True, live files whose size and mtime
+    still match the latest snapshot are re-chunked and compared with it, which
+    catches a backup that skipped or appended to a file that had in fact
+    been changed some other way.
+    """
+    problems = []
+    checked = {}
+    snapshots = list_snapshots(backup_dir)
+    for snapshot_id in snapshots:
+        try:
+            snapshot = load_snapshot(snapshot_id, backup_dir)
+        except (BackupError, ValueError) as e:
+            problems.append(f"{snapshot_id}: {e}")
+            continue
+        rebuild = deep or snapshot_id == snapshots[-1]
+        for name, entry in snapshot["files"].items():
+            if sum(size for _, size in entry["chunks"]) != entry["size"]:
+                problems.append(f"{snapshot_id}/{name}: chunk sizes do not add up")
+            bad = _root(entry["chunks"]) != entry["root"]
+            if bad:
+                problems.append(f"{snapshot_id}/{name}: chunk list does not match root hash")
+            for digest, _ in entry["chunks"]:
+                if digest not in checked:
+                    try:
+                        _get_chunk(backup_dir, digest)
+                        checked[digest] = None
+                    except BackupError as e:
+                        checked[digest] = str(e)
+                if checked[digest]:
+                    bad = True
+                    problems.append(f"{snapshot_id}/{name}: {checked[digest]}")
+            if rebuild and not bad:
+                try:
+                    _assemble(entry, backup_dir)
+                except BackupError as e:
+                    problems.append(f"{snapshot_id}/{name}: {e}")
+
+        if live and snapshot_id == snapshots[-1]:
+            for name, entry in snapshot["files"].items():
+                try:
+                    st = os.stat(name)
+                except FileNotFoundError:
+                    continue
+                if st.st_size != entry["size"] or st.st_mtime_ns != entry["mtime_ns"]:
+                    continue  # changed since, the next backup will pick it up
+                with open(name, "rb") as f:
+                    chunks = [[_digest(c), len(c)] for c in _chunker(name)(f.read())]
+                if _root(chunks) != entry["root"]:
+                    problems.append(f"{snapshot_id}/{name}: does not match the live file")
+    return problems
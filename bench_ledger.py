@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import date, timedelta
+
+from ledger_core import append_entries, build_entry, load_ledger, summary, filter_by_date
+from ledger_api import make_server
+
+# ---------------------------
+# Throughput benchmark
+# ---------------------------
+# Runs against a throw-away data.csv in a temp folder, never the real ledger.
+# python bench_ledger.py --entries 20000 --batch-size 500
+
+SERVICES = ["NEW PAN CARD", "NEW PASSPORT", "DIGITAL SIGNATURE", "AADHAR PRINT", "ONLINE SERVICES"]
+EXPENSES = ["Stationery", "Food", "Power Bill"]
+
+
+def random_spec(rng, day):
+    if rng.random() < 0.1:
+        return {"kind": "expense", "date": str(day), "expense_type": rng.choice(EXPENSES),
+                "amount": rng.randint(50, 2000)}
+    apps = rng.randint(1, 5)
+    fee = rng.choice([107.0, 1500.0, 850.0, 20.0])
+    return {"kind": "service", "date": str(day), "customer": f"Agent {rng.randint(1, 50)}",
+            "service": rng.choice(SERVICES), "applications": apps, "govt_fee": fee,
+            "amount_received": fee * apps + rng.randint(50, 500),
+            "payment_status": rng.choice(["Paid", "Paid", "Pending"])}
+
+
+def make_specs(n, seed=0):
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+    return [random_spec(rng, start + timedelta(days=i * 365 // max(n, 1))) for i in range(n)]
+
+
+def timed(label, n, unit, fn):
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<38} {n:>8} {unit:<8} {elapsed:8.3f}s  {n / elapsed:12,.0f} {unit}/s")
+
+
+def bench_core(path, specs, batch_size):
+    def run():
+        for i in range(0, len(specs), batch_size):
+            append_entries([build_entry(s) for s in specs[i:i + batch_size]], path)
+    timed(f"core insert (batch {batch_size})", len(specs), "rows", run)
+
+
+def bench_reports(path, queries):
+    def run():
+        for i in range(queries):
+            month = i % 12 + 1
+            summary(filter_by_date(load_ledger(path), f"2025-{month:02d}-01", f"2025-{month:02d}-31"))
+    timed("core summary query (cached load)", queries, "queries", run)
+
+
+def bench_http(path, specs, batch_size, clients):
+    server = make_server(port=0, file_name=path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    batches = [specs[i:i + batch_size] for i in range(0, len(specs), batch_size)]
+
+    def post(batch):
+        req = urllib.request.Request(f"{url}/entries", data=json.dumps({"entries": batch}).encode(),
+                                     headers={"Content-Type": "application/json"})
+        urllib.request.urlopen(req).read()
+
+    def run():
+        threads = []
+        for c in range(clients):
+            mine = batches[c::clients]
+            t = threading.Thread(target=lambda mine=mine: [post(b) for b in mine])
+            threads.append(t)
+            t.start()
+        for t in threads:
+            t.join()
+
+    try:
+        timed(f"http insert ({clients} clients, batch {batch_size})", len(specs), "rows", run)
+        timed("http summary query", 200, "queries",
+              lambda: [urllib.request.urlopen(f"{url}/reports/summary?start=2025-03-01&end=2025-03-31").read()
+                       for _ in range(200)])
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ledger throughput benchmark")
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    specs = make_specs(args.entries)
+    with tempfile.TemporaryDirectory() as tmp:
+        core_path = os.path.join(tmp, "core.csv")
+        # One row per write, like the Streamlit forms, on a small sample for comparison
+        bench_core(os.path.join(tmp, "single.csv"), specs[:1000], 1)
+        bench_core(core_path, specs, args.batch_size)
+        bench_reports(core_path, args.queries)
+        bench_http(os.path.join(tmp, "http.csv"), specs, args.batch_size, args.clients)
+        rows = len(load_ledger(os.path.join(tmp, "http.csv")))
+        print(f"http ledger rows after run: {rows} (expected {len(specs)})")
+
+
+if __name__ == "__main__":
+    main()
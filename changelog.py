@@ -0,0 +1,172 @@
+import json
+import math
+import os
+import uuid
+
+# ---------------------------
+# Change log
+# ---------------------------
+# Every change to a ledger is appended to <ledger>_sync/changelog.jsonl as
+#   {"origin": ..., "seq": n, "clock": c, "op": "insert"|"update"|"delete",
+#    "row_id": ..., "base": <version before the change>, "row": {...}}
+# "origin" identifies the tracker instance that made the change and "seq"
+# counts that instance's changes. "clock" is a Lamport clock: it is higher
+# than the clock of every change the instance had made or imported before,
+# so a change always ranks above the ones it was made on top of.
+# "origin:seq:clock" is the row's version.
+#
+# <ledger>_sync/instance.json holds this instance's origin, last seq and
+# clock, the last seq applied from every other origin, and how far each
+# peer's exports have got through the log. Deleted rows leave their last
+# version in tombstones.jsonl.
+
+
+def sync_dir(file_name):
+    return os.path.splitext(file_name)[0] + "_sync"
+
+
+def log_path(file_name):
+    return os.path.join(sync_dir(file_name), "changelog.jsonl")
+
+
+def _state_path(file_name):
+    return os.path.join(sync_dir(file_name), "instance.json")
+
+
+def _tombstones_path(file_name):
+    return os.path.join(sync_dir(file_name), "tombstones.jsonl")
+
+
+def load_state(file_name):
+    try:
+        with open(_state_path(file_name), encoding="utf-8") as f:
+            state = json.load(f)
+        state.setdefault("clock", state["seq"])  # saved before clocks
+        return state
+    except FileNotFoundError:
+        state = {"origin": uuid.uuid4().hex, "seq": 0, "clock": 0, "applied": {}, "exported": {}}
+        save_state(file_name, state)
+        return state
+
+
+def save_state(file_name, state):
+    path = _state_path(file_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def reset_origin(file_name):
+    """Start a new instance id after the change log was restored from a backup.
+
+    The restored log ends before changes this office has already sent out, so
+    carrying on with the old id would reuse sequence numbers that peers skip
+    as duplicates. Applied seqs are rebuilt from the log (the old id included,
+    so its records are not taken back) and peer export offsets are capped at
+    the restored log size.
+    """
+    applied = {}
+    clock = size = 0
+    if os.path.exists(log_path(file_name)):
+        size = os.path.getsize(log_path(file_name))
+        with open(log_path(file_name), encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    applied[record["origin"]] = max(applied.get(record["origin"], 0), record["seq"])
+                    clock = max(clock, clock_of(record))
+    try:
+        with open(_state_path(file_name), encoding="utf-8") as f:
+            exported = json.load(f).get("exported", {})
+    except FileNotFoundError:
+        exported = {}
+    state = {
+        "origin": uuid.uuid4().hex,
+        "seq": 0,
+        "clock": clock,
+        "applied": applied,
+        "exported": {peer: min(offset, size) for peer, offset in exported.items()}
+    }
+    save_state(file_name, state)
+    return state
+
+
+def new_row_id():
+    return uuid.uuid4().hex
+
+
+def clock_of(record):
+    return record.get("clock", record["seq"])  # records logged before clocks
+
+
+def version(record):
+    return f"{record['origin']}:{record['seq']}:{clock_of(record)}"
+
+
+def rank(row_version):
+    """Order of row versions: the higher clock wins, ties go by origin id."""
+    origin, seq, *clock = str(row_version).split(":")
+    return int(clock[0] if clock else seq), origin
+
+
+def load_tombstones(file_name):
+    """Row ID -> version of the delete, for rows deleted here or by a sync."""
+    tombstones = {}
+    if os.path.exists(_tombstones_path(file_name)):
+        with open(_tombstones_path(file_name), encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row_id, row_version = json.loads(line)
+                    tombstones[row_id] = row_version
+    return tombstones
+
+
+def add_tombstones(file_name, tombstones):
+    if not tombstones:
+        return
+    os.makedirs(sync_dir(file_name), exist_ok=True)
+    with open(_tombstones_path(file_name), "a", encoding="utf-8") as f:
+        for row_id, row_version in tombstones.items():
+            f.write(json.dumps([row_id, row_version]) + "\n")
+
+
+def _json_value(value):
+    # numpy scalars coming out of pandas rows
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def _clean_row(row):
+    # Empty cells come out of pandas as NaN, which isn't valid JSON
+    return {k: None if isinstance(v, float) and math.isnan(v) else v for k, v in row.items()}
+
+
+def append_records(file_name, records):
+    """Append already-numbered records (local or imported) to the log."""
+    if not records:
+        return
+    path = log_path(file_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, default=_json_value, separators=(",", ":")) + "\n")
+
+
+def record_changes(file_name, changes):
+    """Number local changes with this instance's origin, log them and return them.
+
+    `changes` are dicts with op, row_id, base and (for insert/update) row.
+    Callers hold ledger_core.ledger_lock.
+    """
+    state = load_state(file_name)
+    records = []
+    for change in changes:
+        state["seq"] += 1
+        state["clock"] += 1
+        if "row" in change:
+            change = {**change, "row": _clean_row(change["row"])}
+        records.append({"origin": state["origin"], "seq": state["seq"], "clock": state["clock"], **change})
+    append_records(file_name, records)
+    save_state(file_name, state)
+    return records
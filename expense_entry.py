@@ -1,6 +1,5 @@
 import streamlit as st
-import pandas as pd
-from utils import load_data, save_data
+from ledger_core import expense_entry, append_entries
 
 OFFICE_EXPENSES = [
     "Office Rent", "Salaries", "Power Bill", "Water Bill",
@@ -16,22 +15,5 @@ def expense_entry_page():
     remarks = st.text_area("Remarks")
 
     if st.button("Save Expense Entry"):
-        df = load_data()
-
-        new_entry = {
-            "Date": str(date),
-            "Type": "Expense",
-            "Customer": "",
-            "Service": expense_type,
-            "Expense": amount,
-            "Income": 0.0,
-            "Profit": -amount,
-            "Payment Status": "",
-            "Amount Received": 0.0,
-            "Pending Amount": 0.0,
-            "Remarks": remarks
-        }
-
-        df = pd.concat([df, pd.DataFrame([new_entry])], ignore_index=True)
-        save_data(df)
+        append_entries([expense_entry(date, expense_type, amount, remarks)])
         st.success("✅ Expense Entry Saved Successfully!")
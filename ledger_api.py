@@ -0,0 +1,140 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from ledger_core import (
+    build_entry, append_entries, update_entry, load_ledger, filter_by_date,
+    daily_balances, summary
+)
+
+# ---------------------------
+# Local HTTP/JSON service
+# ---------------------------
+# POST /entries          {"entries": [{"kind": "service", ...}, ...]}
+# PATCH /entries/<row id> {"changes": {"Payment Status": "Paid", ...}}
+# GET  /entries          ?start=YYYY-MM-DD&end=YYYY-MM-DD
+# GET  /reports/summary  ?start=...&end=...
+# GET  /reports/daily    ?start=...&end=...
+# GET  /health
+
+
+def _filtered(query, file_name):
+    start = query.get("start", [None])[0]
+    end = query.get("end", [None])[0]
+    return filter_by_date(load_ledger(file_name), start, end)
+
+
+def _records(df):
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+class LedgerHandler(BaseHTTPRequestHandler):
+    file_name = None
+    protocol_version = "HTTP/1.1"
+
+    def _payload(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        try:
+            if url.path == "/health":
+                self._send(200, {"status": "ok"})
+            elif url.path == "/entries":
+                self._send(200, {"entries": _records(_filtered(query, self.file_name))})
+            elif url.path == "/reports/summary":
+                self._send(200, summary(_filtered(query, self.file_name)))
+            elif url.path == "/reports/daily":
+                balances = daily_balances(_filtered(query, self.file_name))
+                self._send(200, {"daily": _records(balances)})
+            else:
+                self._send(404, {"error": "not found"})
+        except (KeyError, ValueError) as e:
+            self._send(400, {"error": str(e)})
+        except OSError as e:
+            self._send(500, {"error": f"Could not read the ledger: {e}"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/entries":
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            payload = self._payload()
+            specs = payload["entries"] if isinstance(payload, dict) else payload
+            if not isinstance(specs, list):
+                raise TypeError
+        except (KeyError, TypeError, ValueError):
+            self._send(400, {"error": 'Expected a body like {"entries": [{"kind": "service", ...}]}'})
+            return
+
+        # Check the whole batch first so a bad row never half-writes it
+        rows = []
+        for i, spec in enumerate(specs):
+            try:
+                if not isinstance(spec, dict):
+                    raise TypeError("expected a JSON object")
+                rows.append(build_entry(spec))
+            except (TypeError, ValueError) as e:
+                self._send(400, {"error": f"entry {i}: {e}"})
+                return
+        try:
+            inserted = append_entries(rows, self.file_name)
+        except OSError as e:
+            self._send(500, {"error": f"Could not save entries: {e}"})
+            return
+        self._send(200, {"inserted": inserted})
+
+    def do_PATCH(self):
+        path = urlparse(self.path).path
+        if not path.startswith("/entries/"):
+            self._send(404, {"error": "not found"})
+            return
+        row_id = path[len("/entries/"):]
+        try:
+            changes = self._payload()["changes"]
+            if not isinstance(changes, dict):
+                raise TypeError
+        except (KeyError, TypeError, ValueError):
+            self._send(400, {"error": 'Expected a body like {"changes": {"Remarks": "..."}}'})
+            return
+        try:
+            update_entry(row_id, changes, self.file_name)
+        except KeyError:
+            self._send(404, {"error": f"No entry with Row ID {row_id}"})
+            return
+        except (TypeError, ValueError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        except OSError as e:
+            self._send(500, {"error": f"Could not save the entry: {e}"})
+            return
+        self._send(200, {"updated": row_id})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=8502, file_name=None):
+    handler = type("BoundLedgerHandler", (LedgerHandler,), {"file_name": file_name})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(host="127.0.0.1", port=8502, file_name=None):
+    server = make_server(host, port, file_name)
+    print(f"Ledger service on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import sys
+
+from ledger_core import (
+    EDITABLE, build_entry, append_entries, update_entry, load_ledger, filter_by_date,
+    daily_balances, summary
+)
+
+# ---------------------------
+# Command line
+# ---------------------------
+# python ledger_cli.py add entries.jsonl
+# python ledger_cli.py edit <row id> --set "Payment Status=Partial" --set "Amount Received=500"
+# python ledger_cli.py report summary --start 2025-08-01 --end 2025-08-31
+# python ledger_cli.py report daily --format csv
+# python ledger_cli.py serve --port 8502
+# python ledger_cli.py backup
+# python ledger_cli.py restore --at 2025-08-31 --to restored/
+# python ledger_cli.py sync-export office2 to_office2.nsync
+# python ledger_cli.py sync-import from_office2.nsync
+
+
+def read_specs(path):
+    """Entries come as a JSON array or one JSON object per line ("-" = stdin)."""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        text = f.read().strip()
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def cmd_add(args):
+    rows = []
+    for i, spec in enumerate(read_specs(args.file)):
+        try:
+            rows.append(build_entry(spec))
+        except (TypeError, ValueError) as e:
+            sys.exit(f"Entry {i}: {e} (nothing was inserted)")
+    inserted = 0
+    for i in range(0, len(rows), args.batch_size):
+        inserted += append_entries(rows[i:i + args.batch_size], args.data)
+    print(f"Inserted {inserted} entries")
+
+
+def cmd_edit(args):
+    changes = {}
+    for item in args.set:
+        field, sep, value = item.partition("=")
+        if not sep:
+            sys.exit(f"Expected Field=value, got {item!r}")
+        changes[field.strip()] = value
+    try:
+        update_entry(args.row_id, changes, args.data)
+    except KeyError as e:
+        sys.exit(e.args[0])
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"Updated {args.row_id}")
+
+
+def cmd_report(args):
+    df = filter_by_date(load_ledger(args.data), args.start, args.end)
+    if args.kind == "summary":
+        result = summary(df)
+        if args.format == "csv":
+            for key, value in result.items():
+                print(f"{key},{value}")
+        else:
+            print(json.dumps(result, indent=2))
+        return
+
+    report = daily_balances(df) if args.kind == "daily" else df
+    if args.format == "csv":
+        report.to_csv(sys.stdout, index=False)
+    else:
+        print(report.to_json(orient="records", date_format="iso", indent=2))
+
+
+def cmd_serve(args):
+    from ledger_api import serve
+    serve(args.host, args.port, args.data)
+
+
+def _snapshot(args, full=False):
+    import backup
+    from changelog import sync_dir
+    sources, ledgers = backup.SOURCES, backup.LEDGERS
+    if args.data:
+        sources = sources + [args.data, os.path.join(sync_dir(args.data), "*.jsonl")]
+        ledgers = ledgers + [args.data]
+    return backup.create_snapshot(sources, args.dest, full, ledgers)
+
+
+def cmd_backup(args):
+    snapshot_id, stats = _snapshot(args, args.full)
+    print(f"Snapshot {snapshot_id}: read {stats['bytes_read']:,} bytes, "
+          f"stored {stats['chunks_written']} new chunks ({stats['bytes_written']:,} bytes)")
+
+
+def cmd_snapshots(args):
+    import backup
+    for snapshot_id in backup.list_snapshots(args.dest):
+        snapshot = backup.load_snapshot(snapshot_id, args.dest)
+        size = sum(f["size"] for f in snapshot["files"].values())
+        print(f"{snapshot_id}  {snapshot['created']}  {len(snapshot['files'])} files  {size:,} bytes")
+
+
+def cmd_restore(args):
+    import backup
+    snapshot_id = args.snapshot or backup.find_snapshot(args.at, args.dest)
+    live = os.path.realpath(args.to) == os.path.realpath(os.getcwd())
+    if live and not args.overwrite_live:
+        sys.exit("Restoring into the working folder overwrites the live books; "
+                 "pass --overwrite-live to do it anyway, or choose another --to folder")
+    if live:
+        safety_id, _ = _snapshot(args)
+        print(f"Saved the current books as snapshot {safety_id} first")
+    ledgers = backup.LEDGERS + [args.data] if args.data else backup.LEDGERS
+    for name in backup.restore(snapshot_id, args.to, args.dest, args.file, live, ledgers):
+        print(f"Restored {name} from {snapshot_id} into {args.to}")
+
+
+def cmd_verify(args):
+    import backup
+    problems = backup.verify(args.dest, args.deep, args.live)
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(1)
+    print("All snapshots OK")
+
+
+def cmd_sync_export(args):
+    import sync
+    count = sync.export_changes(args.peer, args.out, args.data, args.full)
+    print(f"Exported {count} changes for {args.peer} to {args.out}")
+
+
+def cmd_sync_import(args):
+    import sync
+    for path in args.files:
+        result = sync.import_changes(path, args.data)
+        print(f"{path}: applied {result['applied']}, already had {result['duplicates']}, "
+              f"conflicts {len(result['conflicts'])}")
+        for conflict in result["conflicts"]:
+            record = conflict["record"]
+            print(f"  conflict on row {record['row_id']} ({record['op']}): {conflict['reason']}, "
+                  f"{conflict['resolution']}")
+        for origin, seq in result["gaps"].items():
+            print(f"  missing changes from {origin} starting at #{seq}; "
+                  f"ask that office for a sync-export --full")
+
+
+def cmd_sync_conflicts(args):
+    import sync
+    for conflict in sync.list_conflicts(args.data):
+        record = conflict["record"]
+        print(f"{record['row_id']}  {record['op']} from {record['origin']}:{record['seq']}  "
+              f"{conflict['reason']}  -> {conflict.get('resolution', 'not applied')}")
+
+
+def cmd_sync_status(args):
+    import sync
+    print(json.dumps(sync.status(args.data), indent=2))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="NANI ASSOCIATES ledger tools")
+    parser.add_argument("--data", help="Ledger CSV (default: data.csv)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="Insert entries from a JSON/JSONL file")
+    add.add_argument("file")
+    add.add_argument("--batch-size", type=int, default=1000)
+    add.set_defaults(func=cmd_add)
+
+    edit = sub.add_parser("edit", help="Change fields of one entry",
+                          epilog="Service fields: " + ", ".join(EDITABLE["Service"])
+                                 + ". Expense fields: " + ", ".join(EDITABLE["Expense"])
+                                 + ". Totals, profit and pending amounts are recomputed.")
+    edit.add_argument("row_id")
+    edit.add_argument("--set", action="append", required=True, metavar="FIELD=VALUE")
+    edit.set_defaults(func=cmd_edit)
+
+    report = sub.add_parser("report", help="Print a report")
+    report.add_argument("kind", choices=["summary", "daily", "entries"])
+    report.add_argument("--start")
+    report.add_argument("--end")
+    report.add_argument("--format", choices=["json", "csv"], default="json")
+    report.set_defaults(func=cmd_report)
+
+    serve = sub.add_parser("serve", help="Run the local HTTP/JSON service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8502)
+    serve.set_defaults(func=cmd_serve)
+
+    backup = sub.add_parser("backup", help="Snapshot the ledger files")
+    backup.add_argument("--dest", default="backups")
+    backup.add_argument("--full", action="store_true", help="Re-read every file")
+    backup.set_defaults(func=cmd_backup)
+
+    snapshots = sub.add_parser("snapshots", help="List backup snapshots")
+    snapshots.add_argument("--dest", default="backups")
+    snapshots.set_defaults(func=cmd_snapshots)
+
+    restore = sub.add_parser("restore", help="Restore a snapshot")
+    restore.add_argument("snapshot", nargs="?", help="Snapshot id (default: latest)")
+    restore.add_argument("--at", help="Latest snapshot taken at or before this date/time")
+    restore.add_argument("--to", required=True, help="Folder to restore into")
+    restore.add_argument("--overwrite-live", action="store_true",
+                         help="Allow --to to be the working folder (snapshots the current books first)")
+    restore.add_argument("--file", action="append", help="Only restore this file")
+    restore.add_argument("--dest", default="backups")
+    restore.set_defaults(func=cmd_restore)
+
+    verify = sub.add_parser("verify", help="Check every backup chunk")
+    verify.add_argument("--dest", default="backups")
+    verify.add_argument("--deep", action="store_true", help="Rebuild every snapshot's files, not just the latest")
+    verify.add_argument("--live", action="store_true", help="Also compare the latest snapshot with the live files")
+    verify.set_defaults(func=cmd_verify)
+
+    sync_export = sub.add_parser("sync-export", help="Export changes for another office")
+    sync_export.add_argument("peer", help="Name of the office the file is for")
+    sync_export.add_argument("out")
+    sync_export.add_argument("--full", action="store_true", help="Re-send the whole change log")
+    sync_export.set_defaults(func=cmd_sync_export)
+
+    sync_import = sub.add_parser("sync-import", help="Import another office's changes")
+    sync_import.add_argument("files", nargs="+")
+    sync_import.set_defaults(func=cmd_sync_import)
+
+    sync_conflicts = sub.add_parser("sync-conflicts", help="List conflicts settled by imports")
+    sync_conflicts.set_defaults(func=cmd_sync_conflicts)
+
+    sync_status = sub.add_parser("sync-status", help="Show sync state")
+    sync_status.set_defaults(func=cmd_sync_status)
+
+    return parser
+
+
+def main(argv=None):
+    from backup import BackupError
+    from sync import SyncError
+    args = build_parser().parse_args(argv)
+    try:
+        args.func(args)
+    except BackupError as e:
+        sys.exit(f"Backup error: {e}")
+    except SyncError as e:
+        sys.exit(f"Sync error: {e}")
+
+
+if __name__ == "__main__":
+    main()
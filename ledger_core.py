@@ -0,0 +1,394 @@
+import csv
+import datetime
+import math
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import pandas as pd
+from utils import FILE_NAME, COLUMNS, load_data, save_data
+from changelog import record_changes, new_row_id, version, sync_dir, add_tombstones
+
+# ---------------------------
+# Ledger core (no Streamlit)
+# ---------------------------
+# The Streamlit pages, the HTTP service and the CLI all go through these
+# functions so every caller computes entries the same way and writes to the
+# same data.csv. Every write is also recorded in the change log used by
+# branch sync (see changelog.py / sync.py).
+
+SYNC_COLUMNS = ["Row ID", "Version"]
+
+_thread_lock = threading.RLock()
+_held = {}
+_cache = {}
+
+
+def _path(file_name):
+    return file_name or FILE_NAME
+
+
+@contextmanager
+def ledger_lock(file_name=None):
+    """Serialise writers across threads and processes (app, CLI, service).
+
+    Re-entrant within a thread, so locked helpers can call each other.
+    """
+    path = os.path.normpath(_path(file_name))
+    with _thread_lock:
+        if path not in _held:
+            os.makedirs(sync_dir(path), exist_ok=True)
+            f = open(os.path.join(sync_dir(path), "ledger.lock"), "a+")
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            _held[path] = [f, 0]
+        _held[path][1] += 1
+        try:
+            yield
+        finally:
+            _held[path][1] -= 1
+            if _held[path][1] == 0:
+                f = _held.pop(path)[0]
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+                f.close()
+
+
+# ---------------------------
+# Entry computation
+# ---------------------------
+PAYMENT_STATUSES = ["Paid", "Pending", "Partial"]
+
+
+def _check_date(value):
+    """Return the entry date as YYYY-MM-DD, rejecting anything else."""
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    try:
+        return datetime.date.fromisoformat(str(value)).isoformat()
+    except ValueError:
+        raise ValueError(f"Invalid date {value!r}, expected YYYY-MM-DD")
+
+
+def _check_amount(name, value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    if math.isnan(value) or math.isinf(value) or value < 0:
+        raise ValueError(f"{name} must be zero or more, got {value!r}")
+    return value
+
+
+def service_entry(date, customer, service, applications=1, govt_fee=0.0,
+                  amount_received=0.0, payment_status="Paid", paid_now=None,
+                  remarks=""):
+    date = _check_date(date)
+    if payment_status not in PAYMENT_STATUSES:
+        raise ValueError(f"Payment status must be one of {PAYMENT_STATUSES}, got {payment_status!r}")
+    try:
+        valid = not isinstance(applications, bool) and float(applications).is_integer() and float(applications) >= 1
+    except (TypeError, ValueError):
+        valid = False
+    if not valid:
+        raise ValueError(f"Applications must be a whole number of at least 1, got {applications!r}")
+    applications = int(float(applications))
+    govt_fee = _check_amount("Govt fee", govt_fee)
+
+    total_expense = govt_fee * applications
+    total_income = _check_amount("Amount received", amount_received)
+    profit = total_income - total_expense
+
+    pending = 0.0
+    received = total_income
+    if payment_status == "Pending":
+        pending = total_income
+    elif payment_status == "Partial":
+        paid_now = _check_amount("Amount received now", paid_now or 0.0)
+        if paid_now > total_income:
+            raise ValueError("Amount received now cannot exceed the amount received")
+        pending = total_income - paid_now
+        received = paid_now
+
+    return {
+        "Date": date,
+        "Type": "Service",
+        "Customer": customer,
+        "Service": service,
+        "Applications": applications,
+        "Expense": total_expense,   # Govt Fee
+        "Income": total_income,     # Amount you charged
+        "Profit": profit,
+        "Payment Status": payment_status,
+        "Amount Received": received,
+        "Pending Amount": pending,
+        "Remarks": remarks
+    }
+
+
+def expense_entry(date, expense_type, amount, remarks=""):
+    date = _check_date(date)
+    amount = _check_amount("Amount", amount)
+    return {
+        "Date": date,
+        "Type": "Expense",
+        "Customer": "",
+        "Service": expense_type,
+        "Applications": 0,
+        "Expense": amount,
+        "Income": 0.0,
+        "Profit": -amount,
+        "Payment Status": "",
+        "Amount Received": 0.0,
+        "Pending Amount": 0.0,
+        "Remarks": remarks
+    }
+
+
+# Fields that can be edited on an existing row -> entry builder argument.
+# Totals, profit and pending amounts are always worked out again from these.
+EDITABLE = {
+    "Service": {
+        "Date": "date", "Customer": "customer", "Service": "service",
+        "Applications": "applications", "Govt Fee": "govt_fee", "Income": "amount_received",
+        "Payment Status": "payment_status", "Amount Received": "paid_now", "Remarks": "remarks"
+    },
+    "Expense": {"Date": "date", "Service": "expense_type", "Expense": "amount", "Remarks": "remarks"},
+}
+
+
+def _text(value):
+    return "" if pd.isna(value) else value
+
+
+def edit_entry(row, changes):
+    """Return the columns of `row` (a ledger row) after applying `changes`.
+
+    `changes` maps EDITABLE field names to new values; the row is rebuilt
+    with service_entry/expense_entry, so it is checked and computed exactly
+    like a new entry.
+    """
+    kind = "Expense" if row["Type"] == "Expense" else "Service"
+    fields = EDITABLE[kind]
+    unknown = [name for name in changes if name not in fields]
+    if unknown:
+        raise ValueError(f"Can't edit {', '.join(map(repr, unknown))} on a {kind.lower()} entry; "
+                         f"editable fields: {', '.join(fields)}")
+
+    if kind == "Expense":
+        args = {"date": row["Date"], "expense_type": row["Service"], "amount": row["Expense"],
+                "remarks": _text(row["Remarks"])}
+    else:
+        applications = 1 if pd.isna(row.get("Applications")) else int(row["Applications"])
+        args = {"date": row["Date"], "customer": _text(row["Customer"]), "service": row["Service"],
+                "applications": applications, "govt_fee": row["Expense"] / applications,
+                "amount_received": row["Income"], "payment_status": row["Payment Status"],
+                "paid_now": row["Amount Received"], "remarks": _text(row["Remarks"])}
+    args.update({fields[name]: value for name, value in changes.items()})
+
+    if kind == "Expense":
+        entry = expense_entry(**args)
+    else:
+        entry = service_entry(**args)
+        if "Govt Fee" not in changes and "Applications" not in changes:
+            # Keep the stored total rather than fee * applications rounded again
+            entry["Expense"] = float(row["Expense"])
+            entry["Profit"] = entry["Income"] - entry["Expense"]
+        if "Amount Received" in changes and entry["Amount Received"] != float(changes["Amount Received"]):
+            raise ValueError(f"Amount Received only applies to Partial payments "
+                             f"(Payment Status is {entry['Payment Status']})")
+    return entry
+
+
+def build_entry(spec):
+    """Turn a JSON request ({"kind": "service"|"expense", ...}) into a row."""
+    spec = dict(spec)
+    kind = spec.pop("kind", "service")
+    if kind == "service":
+        return service_entry(**spec)
+    if kind == "expense":
+        return expense_entry(**spec)
+    raise ValueError(f"Unknown entry kind: {kind!r}")
+
+
+# ---------------------------
+# Store
+# ---------------------------
+def _header(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+
+def load_ledger(file_name=None):
+    """Read the ledger, reusing the last parse while the file is unchanged."""
+    path = _path(file_name)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return load_data(path)
+
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _cache.get(path)
+    if cached is None or cached[0] != key:
+        cached = (key, load_data(path))
+        _cache[path] = cached
+    return cached[1].copy()
+
+
+def load_rows(file_name=None):
+    """Uncached read with the sync columns present, for read-modify-write."""
+    df = load_data(_path(file_name))
+    for col in SYNC_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    return df
+
+
+def upgrade_ledger(file_name=None):
+    """Bring a ledger saved by an older version to the current columns, once.
+
+    Rows saved before the change log existed get a Row ID, logged as inserts
+    so they can be synced. Ledgers already on the current columns are left
+    alone after reading just their header line.
+    """
+    path = _path(file_name)
+    if not os.path.exists(path) or _header(path)[:len(COLUMNS)] == COLUMNS:
+        return 0
+    with ledger_lock(path):
+        df = load_rows(path)
+        if "Applications" not in df.columns:
+            df["Applications"] = 1  # fallback for old data
+        missing = df.index[df["Row ID"].isna()]
+        records = record_changes(path, [
+            {"op": "insert", "row_id": new_row_id(), "base": None,
+             "row": df.loc[i].drop(SYNC_COLUMNS).to_dict()}
+            for i in missing
+        ])
+        df["Row ID"] = df["Row ID"].astype(object)
+        df["Version"] = df["Version"].astype(object)
+        for i, r in zip(missing, records):
+            df.at[i, "Row ID"] = r["row_id"]
+            df.at[i, "Version"] = version(r)
+        save_data(df[COLUMNS + [c for c in df.columns if c not in COLUMNS]], path)
+    return len(missing)
+
+
+def write_rows(rows, file_name=None):
+    """Add rows to the end of the ledger. Callers hold ledger_lock."""
+    path = _path(file_name)
+    upgrade_ledger(path)
+    new_rows = pd.DataFrame(rows, columns=COLUMNS)
+    new_rows.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+
+def append_entries(entries, file_name=None):
+    """Write a batch of rows in one go and return how many were written."""
+    entries = list(entries)
+    if not entries:
+        return 0
+    path = _path(file_name)
+
+    with ledger_lock(path):
+        records = record_changes(path, [
+            {"op": "insert", "row_id": new_row_id(), "base": None,
+             "row": {k: v for k, v in entry.items() if k not in SYNC_COLUMNS}}
+            for entry in entries
+        ])
+        write_rows([
+            {**r["row"], "Row ID": r["row_id"], "Version": version(r)} for r in records
+        ], path)
+    return len(entries)
+
+
+def update_entry(row_id, changes, file_name=None):
+    """Edit one row by Row ID (see edit_entry). The change log gets the whole
+    edited row so every office ends up with identical rows after a sync."""
+    path = _path(file_name)
+    with ledger_lock(path):
+        upgrade_ledger(path)
+        df = load_rows(path)
+        match = df.index[df["Row ID"] == row_id]
+        if match.empty:
+            raise KeyError(f"No entry with Row ID {row_id}")
+        i = match[0]
+        base = df.at[i, "Version"]
+        for col, value in edit_entry(df.loc[i], changes).items():
+            df[col] = df[col].astype(object)
+            df.at[i, col] = value
+        record = record_changes(path, [
+            {"op": "update", "row_id": row_id, "base": base,
+             "row": df.loc[i].drop(SYNC_COLUMNS).to_dict()}
+        ])[0]
+        df["Version"] = df["Version"].astype(object)
+        df.at[i, "Version"] = version(record)
+        save_data(df, path)
+    return df
+
+
+def delete_entry(index, file_name=None):
+    path = _path(file_name)
+    with ledger_lock(path):
+        upgrade_ledger(path)
+        df = load_rows(path)
+        row_id = df.at[index, "Row ID"]
+        if pd.notna(row_id):
+            record = record_changes(path, [
+                {"op": "delete", "row_id": row_id, "base": df.at[index, "Version"]}
+            ])[0]
+            add_tombstones(path, {row_id: version(record)})
+        df = df.drop(index=index).reset_index(drop=True)
+        save_data(df, path)
+    return df
+
+
+# ---------------------------
+# Reports
+# ---------------------------
+def filter_by_date(df, start=None, end=None):
+    if start is not None:
+        df = df[df["Date"] >= str(start)]
+    if end is not None:
+        df = df[df["Date"] <= str(end)]
+    return df
+
+
+def daily_balances(df):
+    df = df.copy()
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["Net Cash"] = df["Amount Received"] - df["Expense"]
+
+    daily_balance = df.groupby("Date")["Net Cash"].sum().cumsum().reset_index()
+    daily_balance.rename(columns={"Net Cash": "Closing Balance"}, inplace=True)
+    daily_balance["Opening Balance"] = daily_balance["Closing Balance"].shift(1).fillna(0)
+    return daily_balance
+
+
+def summary(df):
+    if "Applications" not in df.columns:
+        df = df.assign(Applications=1)  # fallback for old data
+
+    balances = daily_balances(df)
+    total_income = float(df["Income"].sum())
+    total_expense = float(df["Expense"].sum())
+    return {
+        "entries": int(len(df)),
+        "total_applications": int(df["Applications"].fillna(0).sum()),
+        "total_income": total_income,
+        "total_expense": total_expense,
+        "total_received": float(df["Amount Received"].sum()),
+        "total_pending": float(df["Pending Amount"].sum()),
+        "net_profit": total_income - total_expense,
+        "closing_balance": float(balances["Closing Balance"].iloc[-1]) if not balances.empty else 0.0
+    }
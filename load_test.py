@@ -0,0 +1,332 @@
+import argparse
+import ast
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import traceback
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from streamlit.testing.v1 import AppTest
+
+# ---------------------------
+# Multi-session load test
+# ---------------------------
+# Drives the real pages headlessly with Streamlit's AppTest, against a
+# temporary data.csv / workbook. Each simulated staff member runs in its own
+# process: AppTest installs a process-wide Streamlit runtime for every run, so
+# two sessions cannot run at the same time in one process.
+#
+# python load_test.py --users 20 --actions 30
+# python load_test.py --users 10 --target app
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+TIMEOUT = 30
+
+# Every AppTest is built outside a server, so Streamlit warns about the missing
+# ScriptRunContext each time. A filter survives Streamlit resetting log levels.
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+    lambda record: "missing ScriptRunContext" not in record.getMessage()
+)
+
+
+def app_setting(name):
+    """Read a constant (FILE_PATH, ADMIN_USER, ...) from app.py without running it."""
+    with open(os.path.join(REPO_DIR, "app.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise KeyError(name)
+
+
+# Weights of each action in the mix
+PAGE_MIX = {"service_entry": 50, "expense_entry": 15, "reports": 25, "reports_page": 10}
+APP_MIX = {"service_entry": 50, "daily_summary": 20, "customer_ledger": 15, "all_transactions": 15}
+
+
+# ---------------------------
+# Page scripts (run by AppTest)
+# ---------------------------
+def _service_entry_script():
+    from service_entry import service_entry_page
+    service_entry_page()
+
+
+def _expense_entry_script():
+    from expense_entry import expense_entry_page
+    expense_entry_page()
+
+
+def _reports_script():
+    from reports import reports_page
+    reports_page()
+
+
+def _reports_page_script():
+    from reports_page import reports_page
+    reports_page()
+
+
+PAGE_SCRIPTS = {
+    "service_entry": _service_entry_script,
+    "expense_entry": _expense_entry_script,
+    "reports": _reports_script,
+    "reports_page": _reports_page_script,
+}
+
+
+# ---------------------------
+# Simulated users
+# ---------------------------
+class PagesUser:
+    """A staff member moving between the modular pages (service_entry.py etc.)."""
+    mix = PAGE_MIX
+
+    def __init__(self, rng, user_id):
+        self.rng = rng
+        self.user_id = user_id
+        self.pages = {}
+
+    def _page(self, name):
+        if name not in self.pages:
+            at = AppTest.from_function(PAGE_SCRIPTS[name], default_timeout=TIMEOUT)
+            at.run()
+            self.pages[name] = at
+        return self.pages[name]
+
+    def warm_up(self):
+        for name in PAGE_SCRIPTS:
+            self._page(name)
+
+    def service_entry(self):
+        at = self._page("service_entry")
+        fee = self.rng.choice([107.0, 850.0, 1500.0])
+        apps = self.rng.randint(1, 3)
+        at.date_input[0].set_value(date.today())
+        at.text_input[0].input(f"Agent {self.user_id}")
+        at.selectbox[0].set_value(self.rng.choice(at.selectbox[0].options))
+        at.number_input[0].set_value(apps)
+        at.number_input[1].set_value(fee)
+        at.number_input[2].set_value(fee * apps + 100)
+        at.selectbox[1].set_value(self.rng.choice(["Paid", "Pending"]))
+        at.button[0].click().run()
+        return at, True
+
+    def expense_entry(self):
+        at = self._page("expense_entry")
+        at.date_input[0].set_value(date.today())
+        at.selectbox[0].set_value(self.rng.choice(at.selectbox[0].options))
+        at.number_input[0].set_value(float(self.rng.randint(50, 500)))
+        at.text_area[0].input(f"load test user {self.user_id}")
+        at.button[0].click().run()
+        return at, True
+
+    def reports(self):
+        at = self._page("reports")
+        at.run()
+        return at, False
+
+    def reports_page(self):
+        at = self._page("reports_page")
+        at.run()
+        return at, False
+
+
+class AppUser:
+    """A staff member logged into app.py (Excel workbook store)."""
+    mix = APP_MIX
+
+    def __init__(self, rng, user_id):
+        self.rng = rng
+        self.user_id = user_id
+        self.at = None
+
+    def _login(self):
+        at = AppTest.from_file(os.path.join(REPO_DIR, "app.py"), default_timeout=TIMEOUT)
+        at.run()
+        at.text_input[0].input(app_setting("ADMIN_USER"))
+        at.text_input[1].input(app_setting("ADMIN_PASS"))
+        at.button[0].click().run()
+        at.run()
+        self.at = at
+
+    def warm_up(self):
+        self._login()
+
+    def _menu(self, item):
+        if self.at is None:
+            self._login()
+        self.at.sidebar.radio[0].set_value(item).run()
+        return self.at
+
+    def service_entry(self):
+        at = self._menu("Service Entry")
+        fee = self.rng.choice([107.0, 850.0, 1500.0])
+        at.text_input[0].input(f"Agent {self.user_id}")
+        at.number_input[0].set_value(fee)
+        at.number_input[1].set_value(fee + 100)
+        at.number_input[2].set_value(fee + 100)
+        at.number_input[3].set_value(fee)
+        at.button[0].click().run()
+        return at, True
+
+    def daily_summary(self):
+        return self._menu("Daily Summary"), False
+
+    def customer_ledger(self):
+        return self._menu("Customer Ledger"), False
+
+    def all_transactions(self):
+        return self._menu("All Transactions"), False
+
+
+USERS = {"pages": PagesUser, "app": AppUser}
+
+
+def run_user(target, user_id, actions, seed):
+    """Run one simulated user and return its latencies, errors, write count,
+    setup time and the time its timed actions took.
+
+    Pages are built and run once (and the app logged into) before the timed
+    loop, so the percentiles measure the actions, not AppTest start-up.
+    """
+    rng = random.Random(seed + user_id)
+    user = USERS[target](rng, user_id)
+    names, weights = zip(*user.mix.items())
+
+    t0 = time.perf_counter()
+    user.warm_up()
+    setup = time.perf_counter() - t0
+    started = time.perf_counter()
+
+    latencies = defaultdict(list)
+    errors = []
+    writes = 0
+    for _ in range(actions):
+        action = rng.choices(names, weights)[0]
+        t0 = time.perf_counter()
+        try:
+            at, is_write = getattr(user, action)()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+            if is_write:
+                writes += 1
+        except Exception as e:
+            errors.append(f"{action}: {type(e).__name__}: {e}")
+            if len(errors) == 1:
+                traceback.print_exc()
+        latencies[action].append(time.perf_counter() - t0)
+    return dict(latencies), errors, writes, setup, time.perf_counter() - started
+
+
+# ---------------------------
+# Store inspection
+# ---------------------------
+def count_rows(target):
+    import pandas as pd
+    if target == "app":
+        file_path = app_setting("FILE_PATH")
+        if not os.path.exists(file_path):
+            return 0
+        return len(pd.read_excel(file_path, sheet_name="Service_Entry"))
+    from utils import load_data
+    return len(load_data())
+
+
+def seed_ledger(target, rows):
+    if rows <= 0 or target != "pages":
+        return
+    from bench_ledger import make_specs
+    from ledger_core import build_entry, append_entries
+    append_entries([build_entry(s) for s in make_specs(rows)])
+
+
+# ---------------------------
+# Report
+# ---------------------------
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, max(0, math.ceil(pct / 100 * len(values)) - 1))
+    return values[k]
+
+
+def print_report(results, elapsed, rows_before, rows_after):
+    latencies = defaultdict(list)
+    errors = []
+    writes = 0
+    setups, busy = [], []
+    for user_latencies, user_errors, user_writes, setup, user_busy in results:
+        for action, values in user_latencies.items():
+            latencies[action].extend(values)
+        errors.extend(user_errors)
+        writes += user_writes
+        setups.append(setup)
+        busy.append(user_busy)
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"\n{'action':<18} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    everything = []
+    for action in sorted(latencies):
+        values = latencies[action]
+        everything.extend(values)
+        print(f"{action:<18} {len(values):>6} {percentile(values, 50) * 1000:>9.1f} "
+              f"{percentile(values, 95) * 1000:>9.1f} {percentile(values, 99) * 1000:>9.1f} "
+              f"{max(values) * 1000:>9.1f}")
+    if everything:
+        print(f"{'all':<18} {total:>6} {percentile(everything, 50) * 1000:>9.1f} "
+              f"{percentile(everything, 95) * 1000:>9.1f} {percentile(everything, 99) * 1000:>9.1f} "
+              f"{max(everything) * 1000:>9.1f}")
+
+    stored = rows_after - rows_before
+    print(f"\nsetup:        {sum(setups) / len(setups):.2f}s per user (not in the latencies)")
+    print(f"wall time:    {elapsed:.2f}s")
+    print(f"throughput:   {total / max(busy):.1f} actions/s (timed actions only)")
+    print(f"errors:       {len(errors)}")
+    for message in sorted(set(errors))[:10]:
+        print(f"  - {message}")
+    print(f"writes:       {writes} saved, {stored} rows stored")
+    print(f"lost writes:  {max(writes - stored, 0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent Streamlit page load test")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--actions", type=int, default=20, help="actions per user")
+    parser.add_argument("--target", choices=sorted(USERS), default="pages",
+                        help="pages = service_entry/expense_entry/reports, app = app.py")
+    parser.add_argument("--seed-rows", type=int, default=2000, help="existing ledger rows")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Relative store paths (data.csv, the workbook) land in a throw-away folder
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="nani_load_") as workdir:
+        os.chdir(workdir)
+        try:
+            seed_ledger(args.target, args.seed_rows)
+            rows_before = count_rows(args.target)
+
+            t0 = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=args.users) as pool:
+                futures = [pool.submit(run_user, args.target, i, args.actions, args.seed)
+                           for i in range(args.users)]
+                results = [f.result() for f in futures]
+            elapsed = time.perf_counter() - t0
+
+            print_report(results, elapsed, rows_before, count_rows(args.target))
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    main()
@@ -39,12 +39,13 @@ def reports_page():
     col5.metric("Closing Balance (₹)", f"{closing_balance:,.2f}")
     import streamlit as st
 import pandas as pd
-from utils import load_data, save_data
+from ledger_core import load_ledger, delete_entry, update_entry, daily_balances, summary
+from sync import list_conflicts
 
 def reports_page():
     st.header("📊 Reports")
 
-    df = load_data()
+    df = load_ledger()
     if df.empty:
         st.info("No data available yet.")
         return
@@ -58,39 +59,63 @@ def reports_page():
     delete_index = st.number_input("Enter Row Number to Delete", min_value=0, max_value=len(df)-1, step=1)
 
     if st.button("Delete Entry"):
-        df = df.drop(index=delete_index).reset_index(drop=True)
-        save_data(df)
+        delete_entry(delete_index)
         st.success(f"✅ Entry {delete_index} deleted successfully!")
-        st.experimental_rerun()
+        st.rerun()
+
+    # Update payment (synced to other offices like any other change)
+    services = df[(df["Type"] == "Service") & df["Row ID"].notna()] if "Row ID" in df.columns else df.iloc[0:0]
+    if not services.empty:
+        st.subheader("💰 Update Payment")
+        labels = (services.index.astype(str) + ": " + services["Customer"].astype(str) + " - "
+                  + services["Service"].astype(str) + " (pending ₹"
+                  + services["Pending Amount"].map("{:,.2f}".format) + ")")
+        update_index = st.selectbox("Select Entry", services.index, format_func=labels.get)
+        row = df.loc[update_index]
+        statuses = ["Paid", "Pending", "Partial"]
+        status = st.selectbox("Payment Status", statuses,
+                              index=statuses.index(row["Payment Status"]) if row["Payment Status"] in statuses else 0)
+        received = st.number_input("Amount Received so far (₹, for Partial)", min_value=0.0,
+                                   max_value=float(row["Income"]),
+                                   value=min(float(row["Amount Received"]), float(row["Income"])), step=50.0)
+        remarks = st.text_input("Remarks", value="" if pd.isna(row["Remarks"]) else str(row["Remarks"]))
+
+        if st.button("Update Payment"):
+            changes = {"Payment Status": status, "Remarks": remarks}
+            if status == "Partial":
+                changes["Amount Received"] = received
+            try:
+                update_entry(row["Row ID"], changes)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            else:
+                st.success(f"✅ Entry {update_index} updated successfully!")
+                st.rerun()
+
+    conflicts = list_conflicts()
+    if conflicts:
+        with st.expander(f"⚠️ Sync conflicts ({len(conflicts)})"):
+            st.dataframe(pd.DataFrame([{
+                "Row ID": c["record"]["row_id"],
+                "Change": c["record"]["op"],
+                "From": f"{c['record']['origin']}:{c['record']['seq']}",
+                "Reason": c["reason"],
+                "Resolution": c.get("resolution", "not applied")
+            } for c in conflicts]))
 
     # --- Reports Section (Balances & Summary) ---
-    df["Date"] = pd.to_datetime(df["Date"])
-    if "Applications" not in df.columns:
-        df["Applications"] = 1  # fallback for old data
-
-    df["Net Cash"] = df["Amount Received"] - df["Expense"]
-
-    daily_balance = df.groupby("Date")["Net Cash"].sum().cumsum().reset_index()
-    daily_balance.rename(columns={"Net Cash": "Closing Balance"}, inplace=True)
-    daily_balance["Opening Balance"] = daily_balance["Closing Balance"].shift(1).fillna(0)
+    daily_balance = daily_balances(df)
+    totals = summary(df)
 
     st.subheader("📅 Daily Balances")
     st.dataframe(daily_balance)
 
     st.subheader("📑 Summary")
-    total_income = df["Income"].sum()
-    total_expense = df["Expense"].sum()
-    total_received = df["Amount Received"].sum()
-    total_pending = df["Pending Amount"].sum()
-    total_apps = df["Applications"].sum()
-    closing_balance = daily_balance["Closing Balance"].iloc[-1]
-
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total Applications", f"{int(total_apps)}")
-    col2.metric("Total Income (₹)", f"{total_income:,.2f}")
-    col3.metric("Total Expense (₹)", f"{total_expense:,.2f}")
+    col1.metric("Total Applications", f"{totals['total_applications']}")
+    col2.metric("Total Income (₹)", f"{totals['total_income']:,.2f}")
+    col3.metric("Total Expense (₹)", f"{totals['total_expense']:,.2f}")
 
     col4, col5 = st.columns(2)
-    col4.metric("Total Pending (₹)", f"{total_pending:,.2f}")
-    col5.metric("Closing Balance (₹)", f"{closing_balance:,.2f}")
-
+    col4.metric("Total Pending (₹)", f"{totals['total_pending']:,.2f}")
+    col5.metric("Closing Balance (₹)", f"{totals['closing_balance']:,.2f}")
@@ -1,11 +1,11 @@
 import streamlit as st
 import pandas as pd
-from utils import load_data
+from ledger_core import load_ledger, filter_by_date, summary
 
 def reports_page():
     st.title("📊 Reports")
 
-    df = load_data()
+    df = load_ledger()
     if df.empty:
         st.warning("No data available!")
         return
@@ -19,7 +19,7 @@ def reports_page():
         st.error("Start date must be before end date")
         return
 
-    filtered = df[(df["Date"] >= str(start_date)) & (df["Date"] <= str(end_date))]
+    filtered = filter_by_date(df, start_date, end_date)
 
     # Show table
     st.subheader("📑 Filtered Records")
@@ -27,9 +27,10 @@ def reports_page():
 
     # Summary
     st.subheader("💰 Summary")
-    total_income = filtered["Income"].sum()
-    total_expense = filtered["Expense"].sum()
-    profit = total_income - total_expense
+    totals = summary(filtered)
+    total_income = totals["total_income"]
+    total_expense = totals["total_expense"]
+    profit = totals["net_profit"]
 
     st.write(f"**Total Income:** ₹{total_income}")
     st.write(f"**Total Expense:** ₹{total_expense}")
@@ -113,7 +113,7 @@ def service_entry_page():
         st.success("✅ Service Entry Saved Successfully!")
         import streamlit as st
 import pandas as pd
-from utils import load_data, save_data
+from ledger_core import service_entry, append_entries
 
 CATEGORIES = [
     "NEW PAN CARD", "CORRECTION PAN CARD", "THUMB PAN CARD", "GAZZETED PAN CARD",
@@ -148,36 +148,18 @@ def service_entry_page():
 
     # Payment status
     payment_status = st.selectbox("Payment Status", ["Paid", "Pending", "Partial"])
-    pending = 0.0
-    if payment_status == "Pending":
-        pending = total_income
-    elif payment_status == "Partial":
+    paid_now = None
+    if payment_status == "Partial":
         paid_now = st.number_input("Amount Received Now (₹)", min_value=0.0, max_value=total_income, step=0.1)
-        pending = total_income - paid_now
-        amount_received = paid_now
 
     remarks = st.text_area("Remarks")
 
     if st.button("Save Service Entry"):
-        df = load_data()
-
-        new_entry = {
-            "Date": str(date),
-            "Type": "Service",
-            "Customer": customer,
-            "Service": service_type,
-            "Applications": num_applications,
-            "Expense": total_expense,   # Govt Fee
-            "Income": total_income,     # Amount you charged
-            "Profit": profit,
-            "Payment Status": payment_status,
-            "Amount Received": amount_received,
-            "Pending Amount": pending,
-            "Remarks": remarks
-        }
-
-        df = pd.concat([df, pd.DataFrame([new_entry])], ignore_index=True)
-        save_data(df)
+        new_entry = service_entry(
+            date, customer, service_type, num_applications, govt_fee,
+            total_income, payment_status, paid_now, remarks
+        )
+        append_entries([new_entry])
         st.success("✅ Service Entry Saved Successfully!")
 
 
@@ -0,0 +1,230 @@
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+from changelog import (
+    load_state, save_state, append_records, log_path, sync_dir, version, rank, clock_of,
+    load_tombstones, add_tombstones
+)
+from ledger_core import ledger_lock, load_rows, write_rows, upgrade_ledger
+from utils import FILE_NAME, COLUMNS, save_data
+
+# ---------------------------
+# Branch-office sync
+# ---------------------------
+# Each tracker exports the part of its change log a peer hasn't been sent yet
+# as a small gzip file, and imports other offices' files:
+#
+#   office1$ python ledger_cli.py sync-export office2 to_office2.nsync
+#   office2$ python ledger_cli.py sync-import to_office2.nsync
+#
+# Imports skip records already applied (per-origin sequence numbers), so the
+# same file can be imported twice, and stop at the first change missing from
+# an office's sequence so changes are always applied in the order they were
+# made. When two offices change the same row independently, every office
+# keeps the version with the higher rank (Lamport clock, then origin id;
+# a delete counts as a version too), so all offices end up with the same
+# books whatever order they import in. Each such case is also written to
+# conflicts.jsonl for review.
+
+FORMAT = "nani-sync-1"
+
+
+class SyncError(Exception):
+    pass
+
+
+def _conflicts_path(file_name):
+    return os.path.join(sync_dir(file_name), "conflicts.jsonl")
+
+
+def export_changes(peer, out_path, file_name=None, full=False):
+    """Write the changes `peer` hasn't been sent yet to out_path; return the count.
+
+    full=True re-sends the whole log (e.g. if an earlier file was lost).
+    """
+    path = file_name or FILE_NAME
+    with ledger_lock(path):
+        upgrade_ledger(path)
+        state = load_state(path)
+        offset = 0 if full else state["exported"].get(peer, 0)
+
+        lines = []
+        if os.path.exists(log_path(path)):
+            with open(log_path(path), "rb") as f:
+                f.seek(offset)
+                lines = f.readlines()
+                end = f.tell()
+        else:
+            end = 0
+
+        header = {
+            "format": FORMAT,
+            "origin": state["origin"],
+            "created": datetime.now(timezone.utc).isoformat(),
+            "count": len(lines)
+        }
+        tmp = f"{out_path}.tmp"
+        with gzip.open(tmp, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.writelines(lines)
+        os.replace(tmp, out_path)
+
+        state["exported"][peer] = end
+        save_state(path, state)
+    return len(lines)
+
+
+RECORD_KEYS = {"origin", "seq", "op", "row_id", "base"}
+
+
+def read_changes(in_path):
+    try:
+        with gzip.open(in_path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if not isinstance(header, dict) or header.get("format") != FORMAT:
+                raise SyncError(f"{in_path} is not a tracker sync file")
+            records = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        raise SyncError(f"{in_path} not found")
+    except (OSError, EOFError, ValueError) as e:
+        # not gzip, cut short, or not JSON
+        raise SyncError(f"{in_path} is not a readable tracker sync file ({e})")
+    if not all(isinstance(r, dict) and RECORD_KEYS <= r.keys() for r in records):
+        raise SyncError(f"{in_path} has malformed change records")
+    return header, records
+
+
+def _select_new(records, state):
+    """Drop records already applied and stop at the first missing seq.
+
+    Files list changes in the order the exporting office applied them, so
+    stopping at a gap keeps every change behind the ones it was made on.
+    """
+    applied = state["applied"]
+    fresh, gaps, duplicates = [], {}, 0
+    for record in records:
+        origin, seq = record["origin"], record["seq"]
+        last = applied.get(origin, 0)
+        if origin == state["origin"] or seq <= last:
+            duplicates += 1
+        elif seq != last + 1:
+            gaps[origin] = last + 1
+            break
+        else:
+            fresh.append(record)
+            applied[origin] = seq
+    return fresh, gaps, duplicates
+
+
+REASONS = {
+    ("update", True): "edited on both sides",
+    ("update", False): "edited here, deleted locally",
+    ("delete", True): "deleted here, edited locally",
+}
+
+
+def _apply(records, path):
+    """Apply changes against the full ledger; return the conflicts.
+
+    Every row ends at its highest-ranked version (see changelog.rank), with
+    deletes counting as versions too, so offices end up with the same rows
+    whatever order they import in.
+    """
+    df = load_rows(path)
+    rows = df.to_dict("records")
+    index = {r["Row ID"]: i for i, r in enumerate(rows) if pd.notna(r["Row ID"])}
+    tombstones = load_tombstones(path)
+    deleted = {}
+    conflicts = []
+
+    for record in records:
+        row_id, op = record["row_id"], record["op"]
+        i = index.get(row_id)
+        local = rows[i]["Version"] if i is not None else tombstones.get(row_id)
+        incoming = version(record)
+        wins = local is None or rank(incoming) > rank(local)
+
+        # Made without seeing the local version: the offices changed it independently
+        reason = REASONS.get((op, i is not None)) if local is not None and record["base"] != local else None
+        if reason:
+            conflicts.append({"reason": reason, "local_version": local,
+                              "resolution": "took theirs" if wins else "kept ours", "record": record})
+        if not wins:
+            continue
+
+        if op == "delete":
+            if i is not None:
+                rows[i] = None
+                del index[row_id]
+            tombstones[row_id] = deleted[row_id] = incoming
+        else:
+            row = {**(rows[i] if i is not None else {}), **record["row"],
+                   "Row ID": row_id, "Version": incoming}
+            if i is None:
+                rows.append(row)
+                index[row_id] = len(rows) - 1
+            else:
+                rows[i] = row
+
+    columns = list(dict.fromkeys(COLUMNS + list(df.columns)))
+    save_data(pd.DataFrame([r for r in rows if r is not None], columns=columns), path)
+    add_tombstones(path, deleted)
+    return conflicts
+
+
+def import_changes(in_path, file_name=None):
+    """Apply another instance's export; return counts and any conflicts."""
+    path = file_name or FILE_NAME
+    header, records = read_changes(in_path)
+
+    with ledger_lock(path):
+        state = load_state(path)
+        fresh, gaps, duplicates = _select_new(records, state)
+        state["clock"] = max([state["clock"]] + [clock_of(r) for r in fresh])
+
+        conflicts = []
+        if any(r["op"] != "insert" for r in fresh):
+            conflicts = _apply(fresh, path)
+        elif fresh:
+            # Inserts only: append, no need to read the ledger
+            write_rows([{**r["row"], "Row ID": r["row_id"], "Version": version(r)} for r in fresh], path)
+
+        # Logged even when conflicting so relayed sequences have no holes and
+        # the next office settles the conflict the same way
+        append_records(path, fresh)
+        if conflicts:
+            with open(_conflicts_path(path), "a", encoding="utf-8") as f:
+                for conflict in conflicts:
+                    f.write(json.dumps(conflict) + "\n")
+        save_state(path, state)
+
+    return {
+        "from": header["origin"],
+        "applied": len(fresh),
+        "duplicates": duplicates,
+        "conflicts": conflicts,
+        "gaps": gaps
+    }
+
+
+def list_conflicts(file_name=None):
+    path = file_name or FILE_NAME
+    if not os.path.exists(_conflicts_path(path)):
+        return []
+    with open(_conflicts_path(path), encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def status(file_name=None):
+    path = file_name or FILE_NAME
+    state = load_state(path)
+    return {
+        "origin": state["origin"],
+        "seq": state["seq"],
+        "applied": state["applied"],
+        "exported": state["exported"],
+        "conflicts": len(list_conflicts(path))
+    }
@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import backup
+from backup import BackupError
+from ledger_core import append_entries, ledger_lock, load_ledger, service_entry, update_entry
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def add(n, start=0):
+    append_entries([service_entry("2025-08-01", f"Customer {i}", "PAN", govt_fee=107,
+                                  amount_received=250, remarks="x" * 40)
+                    for i in range(start, start + n)])
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def snapshot():
+    return backup.create_snapshot(backup_dir="backups")
+
+
+def test_line_chunks_only_change_around_an_insert():
+    lines = [f"2025-08-01,Service,Customer {i},PAN,{i}\n".encode() for i in range(20000)]
+    before = list(backup._chunk_lines(b"".join(lines)))
+    after = list(backup._chunk_lines(b"".join(lines[:10000] + [b"new row\n"] + lines[10000:])))
+
+    assert b"".join(before) == b"".join(lines)
+    assert len(before) > 5
+    assert all(backup.MIN_CHUNK <= len(c) <= backup.MAX_CHUNK for c in before[:-1])
+    assert len(set(before) - set(after)) == 1
+
+
+def test_append_reads_only_the_new_part():
+    add(5000)
+    snapshot()
+    add(20, start=5000)
+    _, stats = snapshot()
+
+    total = os.path.getsize("data.csv") + os.path.getsize("data_sync/changelog.jsonl")
+    assert stats["files_appended"] == 2 and stats["files_rescanned"] == 0
+    assert stats["bytes_read"] < total / 5
+
+    os.makedirs("out")
+    backup.restore(None, "out", "backups")
+    assert read("out/data.csv") == read("data.csv")
+    assert read("out/data_sync/changelog.jsonl") == read("data_sync/changelog.jsonl")
+
+
+def test_same_length_edit_and_append_restore_identical():
+    add(3000)
+    first, _ = snapshot()
+    row_id = load_ledger()["Row ID"][1500]
+    update_entry(row_id, {"Remarks": "y" * 40})  # same length as before
+    add(10, start=3000)
+    second, _ = snapshot()
+
+    backup.restore(second, "out", "backups")
+    assert read("out/data.csv") == read("data.csv")
+    assert backup.verify("backups", deep=True, live=True) == []
+
+    backup.restore(first, "old", "backups")
+    assert len(load_ledger("old/data.csv")) == 3000
+
+
+def test_in_place_edit_is_caught_by_live_verify():
+    add(3000)
+    snapshot()
+    # Same-length edit in the middle that keeps the file (not the ledger's own way of saving)
+    with open("data.csv", "r+b") as f:
+        f.seek(os.path.getsize("data.csv") // 2)
+        f.write(b"#")
+    with open("data.csv", "ab") as f:
+        f.write(read("data.csv").splitlines(keepends=True)[-1])
+    snapshot()
+
+    assert any("does not match the live file" in p for p in backup.verify("backups", live=True))
+    snapshot_id, _ = backup.create_snapshot(backup_dir="backups", full=True)
+    assert backup.verify("backups", live=True) == []
+    backup.restore(snapshot_id, "out", "backups")
+    assert read("out/data.csv") == read("data.csv")
+
+
+def test_tampered_chunk_fails_verify_and_restore():
+    add(500)
+    snapshot_id, _ = snapshot()
+    digest = backup.load_snapshot(snapshot_id, "backups")["files"]["data.csv"]["chunks"][0][0]
+    path = backup._object_path("backups", digest)
+    with open(path, "wb") as f:
+        f.write(backup.zlib.compress(b"forged rows\n"))
+
+    assert any(digest in p for p in backup.verify("backups"))
+    with pytest.raises(BackupError, match="does not match its hash"):
+        backup.restore(snapshot_id, "out", "backups")
+    assert not os.path.exists("out/data.csv")
+
+
+@pytest.mark.parametrize("name", ["../escaped.csv", "sub/../../escaped.csv", os.path.abspath("/tmp/escaped.csv")])
+def test_restore_refuses_names_outside_target(name):
+    add(5)
+    snapshot_id, _ = snapshot()
+    manifest_path = os.path.join("backups", "snapshots", f"{snapshot_id}.json")
+    manifest = json.loads(read(manifest_path))
+    manifest["files"][name] = manifest["files"]["data.csv"]
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+    os.makedirs("out/inner")
+    with pytest.raises(BackupError, match="outside the working folder"):
+        backup.restore(snapshot_id, "out/inner", "backups")
+    assert not os.path.exists("out/escaped.csv") and not os.path.exists("out/inner/data.csv")
+
+
+def test_backup_refuses_files_outside_working_folder(tmp_path):
+    outside = tmp_path.parent / f"{tmp_path.name}_outside.csv"
+    outside.write_text("a,b\n")
+    try:
+        with pytest.raises(BackupError, match="outside the working folder"):
+            backup.create_snapshot([str(outside)], "backups")
+    finally:
+        outside.unlink()
+
+
+def test_restore_into_working_folder_needs_overwrite_live():
+    add(5)
+    snapshot_id, _ = snapshot()
+    with pytest.raises(BackupError, match="overwrite the live books"):
+        backup.restore(snapshot_id, ".", "backups")
+
+
+def test_live_restore_waits_for_the_ledger_lock():
+    add(5)
+    snapshot_id, _ = snapshot()
+    add(5, start=5)
+    done = threading.Event()
+
+    def run():
+        backup.restore(snapshot_id, ".", "backups", overwrite_live=True)
+        done.set()
+
+    with ledger_lock("data.csv"):
+        worker = threading.Thread(target=run)
+        worker.start()
+        assert not done.wait(0.3)
+        assert len(load_ledger()) == 10
+    worker.join(5)
+    assert done.is_set() and len(load_ledger()) == 5
+
+
+def test_find_snapshot_by_date(monkeypatch):
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    try:
+        for snapshot_id in ["20250731T230000000000Z", "20250801T120000000000Z", "20250802T000000000000Z"]:
+            path = os.path.join("backups", "snapshots", f"{snapshot_id}.json")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump({"id": snapshot_id, "files": {}}, f)
+
+        assert backup.find_snapshot("2025-08-01", "backups") == "20250801T120000000000Z"
+        assert backup.find_snapshot("2025-08-01T11:00", "backups") == "20250731T230000000000Z"
+        assert backup.find_snapshot("2025-08-01T13:00+02:00", "backups") == "20250731T230000000000Z"
+        assert backup.find_snapshot(None, "backups") == "20250802T000000000000Z"
+        with pytest.raises(BackupError, match="No snapshot"):
+            backup.find_snapshot("2025-07-30", "backups")
+        with pytest.raises(BackupError, match="Invalid date"):
+            backup.find_snapshot("nonsense", "backups")
+    finally:
+        monkeypatch.undo()
+        time.tzset()
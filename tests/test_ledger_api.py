@@ -0,0 +1,136 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from ledger_api import make_server
+from ledger_core import load_ledger, service_entry
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = str(tmp_path / "data.csv")
+    server = make_server(port=0, file_name=path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def call(method, route, body=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}{route}",
+                                         data=data, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    call.path = path
+    yield call
+    server.shutdown()
+    server.server_close()
+
+
+SERVICE = {"kind": "service", "date": "2025-08-01", "customer": "Ravi", "service": "PAN",
+           "applications": 2, "govt_fee": 107, "amount_received": 400}
+
+
+@pytest.mark.parametrize("changes, message", [
+    ({"date": "01/08/2025"}, "Invalid date"),
+    ({"payment_status": "Later"}, "Payment status"),
+    ({"applications": 0}, "Applications"),
+    ({"applications": 1.5}, "Applications"),
+    ({"govt_fee": -1}, "Govt fee"),
+    ({"amount_received": "abc"}, "Amount received"),
+    ({"payment_status": "Partial", "paid_now": 500}, "cannot exceed"),
+])
+def test_service_entry_rejects_bad_input(changes, message):
+    spec = {k: v for k, v in SERVICE.items() if k != "kind"}
+    with pytest.raises(ValueError, match=message):
+        service_entry(**{**spec, **changes})
+
+
+def test_post_and_report(service):
+    assert service("POST", "/entries", {"entries": [SERVICE, {**SERVICE, "customer": "Sita"}]}) == \
+        (200, {"inserted": 2})
+    status, body = service("GET", "/reports/summary?start=2025-08-01&end=2025-08-31")
+    assert status == 200
+    assert body["entries"] == 2
+    assert body["total_expense"] == 428.0
+    status, body = service("GET", "/entries")
+    assert [e["Customer"] for e in body["entries"]] == ["Ravi", "Sita"]
+
+
+@pytest.mark.parametrize("payload", [
+    {"entries": 5},
+    {"entries": [5]},
+    {"rows": []},
+    "text",
+    {"entries": [SERVICE, {**SERVICE, "date": "2025-13-01"}]},
+    {"entries": [{**SERVICE, "kind": "refund"}]},
+    {"entries": [{**SERVICE, "colour": "red"}]},
+])
+def test_bad_batch_is_rejected_whole(service, payload):
+    status, body = service("POST", "/entries", payload)
+    assert status == 400
+    assert "error" in body
+    assert load_ledger(service.path).empty
+
+
+def test_patch_entry(service):
+    service("POST", "/entries", {"entries": [SERVICE]})
+    row_id = load_ledger(service.path)["Row ID"][0]
+
+    assert service("PATCH", f"/entries/{row_id}", {"changes": {"Remarks": "called"}})[0] == 200
+    assert load_ledger(service.path)["Remarks"][0] == "called"
+    assert service("PATCH", "/entries/nope", {"changes": {"Remarks": "x"}})[0] == 404
+    assert service("PATCH", f"/entries/{row_id}", {"changes": 3})[0] == 400
+    assert service("PATCH", f"/entries/{row_id}", {"changes": {"Date": "soon"}})[0] == 400
+
+
+def test_unknown_route(service):
+    assert service("GET", "/nope")[0] == 404
+    assert service("POST", "/nope", {})[0] == 404
+
+
+def test_patch_recomputes_derived_amounts(service):
+    service("POST", "/entries", {"entries": [SERVICE]})
+    row_id = load_ledger(service.path)["Row ID"][0]
+
+    def row():
+        return load_ledger(service.path).iloc[0]
+
+    assert service("PATCH", f"/entries/{row_id}",
+                   {"changes": {"Payment Status": "Partial", "Amount Received": 150}})[0] == 200
+    assert (row()["Amount Received"], row()["Pending Amount"]) == (150, 250)
+
+    assert service("PATCH", f"/entries/{row_id}", {"changes": {"Applications": 3}})[0] == 200
+    assert (row()["Expense"], row()["Profit"]) == (321, 79)
+
+    assert service("PATCH", f"/entries/{row_id}", {"changes": {"Payment Status": "Paid"}})[0] == 200
+    assert (row()["Amount Received"], row()["Pending Amount"]) == (400, 0)
+
+
+@pytest.mark.parametrize("changes", [
+    {"Amount Received": 40},          # only applies to Partial
+    {"Applications": 2.7},
+    {"Profit": 1000},
+    {"Pending Amount": 0},
+    {"Row ID": "other"},
+    {"Payment Status": "Partial", "Amount Received": 500},
+])
+def test_patch_rejects_bad_edits(service, changes):
+    service("POST", "/entries", {"entries": [SERVICE]})
+    before = load_ledger(service.path)
+    status, body = service("PATCH", f"/entries/{before['Row ID'][0]}", {"changes": changes})
+    assert status == 400, body
+    assert load_ledger(service.path).equals(before)
+
+
+def test_patch_expense(service):
+    service("POST", "/entries", {"entries": [{"kind": "expense", "date": "2025-08-01",
+                                              "expense_type": "Food", "amount": 120}]})
+    row_id = load_ledger(service.path)["Row ID"][0]
+    assert service("PATCH", f"/entries/{row_id}", {"changes": {"Expense": 90}})[0] == 200
+    assert load_ledger(service.path)["Profit"][0] == -90
+    assert service("PATCH", f"/entries/{row_id}", {"changes": {"Customer": "Ravi"}})[0] == 400
@@ -0,0 +1,244 @@
+import gzip
+import os
+import random
+
+import pandas as pd
+import pytest
+
+import backup
+import ledger_cli
+import sync
+from changelog import load_state
+from ledger_core import append_entries, delete_entry, load_rows, service_entry, update_entry
+
+
+@pytest.fixture
+def offices(tmp_path):
+    def office(name):
+        os.makedirs(tmp_path / name, exist_ok=True)
+        return str(tmp_path / name / "data.csv")
+    return office
+
+
+def add(path, *customers):
+    append_entries([service_entry("2025-08-01", c, "PAN", govt_fee=100, amount_received=250)
+                    for c in customers], path)
+
+
+def send(src, dst, full=False):
+    out = os.path.join(os.path.dirname(dst), f"from_{os.path.basename(os.path.dirname(src))}.nsync")
+    sync.export_changes(os.path.dirname(dst), out, src, full)
+    return sync.import_changes(out, dst)
+
+
+def rows(path):
+    return load_rows(path).sort_values("Row ID").reset_index(drop=True)
+
+
+def row_id(path, customer):
+    df = load_rows(path)
+    return df.loc[df["Customer"] == customer, "Row ID"].iloc[0]
+
+
+def assert_same_books(*paths):
+    first = rows(paths[0])
+    for path in paths[1:]:
+        pd.testing.assert_frame_equal(first, rows(path), check_dtype=False)
+
+
+def test_reimport_is_idempotent(offices, tmp_path):
+    a, b = offices("a"), offices("b")
+    add(a, "Ravi", "Sita", "Arjun")
+    out = str(tmp_path / "a_to_b.nsync")
+    assert sync.export_changes("b", out, a) == 3
+
+    first = sync.import_changes(out, b)
+    second = sync.import_changes(out, b)
+
+    assert first["applied"] == 3
+    assert second["applied"] == 0 and second["duplicates"] == 3
+    assert len(load_rows(b)) == 3
+    assert_same_books(a, b)
+
+
+def test_missing_export_is_reported_as_gap(offices, tmp_path):
+    a, b = offices("a"), offices("b")
+    add(a, "Ravi", "Sita")
+    first = str(tmp_path / "1.nsync")
+    sync.export_changes("b", first, a)
+    add(a, "Arjun")
+    second = str(tmp_path / "2.nsync")
+    sync.export_changes("b", second, a)
+
+    result = sync.import_changes(second, b)
+    assert result["applied"] == 0
+    assert result["gaps"] == {load_state(a)["origin"]: 1}
+    assert not os.path.exists(b) or load_rows(b).empty
+
+    sync.import_changes(first, b)
+    assert sync.import_changes(second, b)["applied"] == 1
+    assert_same_books(a, b)
+
+
+def test_edits_on_both_sides_converge(offices):
+    a, b = offices("a"), offices("b")
+    add(a, "Ravi")
+    send(a, b)
+    rid = row_id(a, "Ravi")
+
+    update_entry(rid, {"Remarks": "called at office a"}, a)
+    update_entry(rid, {"Remarks": "called at office b", "Payment Status": "Pending"}, b)
+    to_b = send(a, b)
+    to_a = send(b, a)
+
+    assert to_b["conflicts"][0]["reason"] == "edited on both sides"
+    assert to_a["conflicts"][0]["reason"] == "edited on both sides"
+    assert_same_books(a, b)
+    assert len(sync.list_conflicts(a)) == len(sync.list_conflicts(b)) == 1
+
+
+@pytest.mark.parametrize("later", ["edit", "delete"])
+def test_edit_and_delete_converge_on_the_later_change(offices, later):
+    a, b = offices("a"), offices("b")
+    add(a, "Ravi", "Sita")
+    send(a, b)
+    # The office with more changes behind it has the higher clock
+    add(b if later == "edit" else a, "Arjun", "Meena")
+
+    delete_entry(0, a)
+    update_entry(row_id(b, "Ravi"), {"Payment Status": "Pending"}, b)
+    to_b = send(a, b)
+    to_a = send(b, a)
+
+    assert_same_books(a, b)
+    assert ("Ravi" in set(load_rows(a)["Customer"])) == (later == "edit")
+    assert to_b["conflicts"][0]["reason"] == "deleted here, edited locally"
+    assert to_a["conflicts"][0]["reason"] == "edited here, deleted locally"
+
+
+def export(src, peer, tmp_path):
+    out = str(tmp_path / f"{os.path.basename(os.path.dirname(src))}_to_{peer}.nsync")
+    sync.export_changes(peer, out, src)
+    return out
+
+
+def test_import_order_does_not_matter(offices, tmp_path):
+    a, g, h, x, y = (offices(name) for name in "aghxy")
+    add(a, "Ravi")
+    send(a, g)
+    send(a, h)
+    rid = row_id(a, "Ravi")
+
+    # g has made more changes (higher seq) than a or h
+    add(g, "Sita", "Arjun", "Meena")
+    update_entry(rid, {"Remarks": "g"}, g)
+    update_entry(rid, {"Remarks": "a"}, a)
+    send(a, h)
+    update_entry(rid, {"Remarks": "h"}, h)  # made after seeing a's edit
+
+    files = {name: {peer: export(src, peer, tmp_path) for peer in "xy"}
+             for name, src in [("a", a), ("g", g), ("h", h)]}
+    for name in "gah":
+        sync.import_changes(files[name]["x"], x)
+    for name in "ahg":
+        sync.import_changes(files[name]["y"], y)
+
+    assert_same_books(x, y)
+    # g's and h's edits were made independently; g's has the higher clock
+    assert set(load_rows(x)["Remarks"].dropna()) == {"g"}
+    # h's edit was made on top of a's, so it wins over it regardless of seq
+    send(h, a)
+    assert set(load_rows(a)["Remarks"].dropna()) == {"h"}
+
+    # Later changes rank above everything their office has imported
+    assert load_state(x)["clock"] >= max(load_state(o)["clock"] for o in (a, g, h))
+    update_entry(rid, {"Remarks": "x"}, x)
+    send(x, y)
+    assert load_rows(y).set_index("Row ID").loc[rid, "Remarks"] == "x"
+
+
+def test_third_office_gets_relayed_changes(offices):
+    a, b, c = offices("a"), offices("b"), offices("c")
+    add(a, "Ravi")
+    send(a, b)
+    add(b, "Sita")
+    rid = row_id(a, "Ravi")
+    update_entry(rid, {"Remarks": "from a"}, a)
+    update_entry(rid, {"Remarks": "from b"}, b)
+    send(a, b)
+
+    # c only ever talks to b, which passes on a's changes too
+    send(b, c)
+    assert_same_books(b, c)
+
+    # a's own changes reaching c directly later are already there
+    assert send(a, c)["applied"] == 0
+    send(b, a)
+    assert_same_books(a, b, c)
+
+
+def test_restored_changelog_gets_new_origin(offices, tmp_path, monkeypatch):
+    a, b = offices("a"), offices("b")
+    monkeypatch.chdir(tmp_path / "a")
+    add("data.csv", "Ravi")
+    snapshot_id, _ = backup.create_snapshot(backup_dir="backups")
+    old_origin = load_state("data.csv")["origin"]
+
+    add("data.csv", "Sita")
+    send(a, b)
+    backup.restore(snapshot_id, ".", "backups", overwrite_live=True)
+    add("data.csv", "Arjun")
+
+    state = load_state("data.csv")
+    assert state["origin"] != old_origin
+    assert state["applied"][old_origin] == 1
+    assert send(a, b)["applied"] == 1
+    assert set(load_rows(b)["Customer"]) == {"Ravi", "Sita", "Arjun"}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits_converge(offices, seed):
+    rng = random.Random(seed)
+    names = ["a", "b", "c"]
+    paths = {name: offices(name) for name in names}
+    add(paths["a"], *(f"Customer {i}" for i in range(6)))
+    for name in names[1:]:
+        send(paths["a"], paths[name])
+
+    for step in range(40):
+        path = paths[rng.choice(names)]
+        df = load_rows(path)
+        roll = rng.random()
+        if roll < 0.15 or df.empty:
+            add(path, f"New {step}")
+        elif roll < 0.3:
+            delete_entry(rng.randrange(len(df)), path)
+        elif roll < 0.8:
+            update_entry(rng.choice(list(df["Row ID"])), {"Remarks": f"edit {step}"}, path)
+        else:
+            src, dst = rng.sample(names, 2)
+            send(paths[src], paths[dst])
+
+    for _ in range(2):
+        for src in names:
+            for dst in names:
+                if src != dst:
+                    send(paths[src], paths[dst])
+    assert_same_books(*paths.values())
+
+
+@pytest.mark.parametrize("content", [
+    b"Date,Type\n2025-08-01,Service\n",                                     # not gzip
+    gzip.compress(b'{"format": "other"}\n'),                                 # wrong format
+    gzip.compress(b'{"format": "nani-sync-1"}\n{"origin": "x"}\n'),          # malformed record
+    gzip.compress(b'{"format": "nani-sync-1"}\nnot json\n'),
+    gzip.compress(b'{"format": "nani-sync-1"}\n' * 50)[:40],                 # cut short
+])
+def test_bad_sync_file_is_refused(offices, tmp_path, content):
+    a = offices("a")
+    bad = tmp_path / "bad.nsync"
+    bad.write_bytes(content)
+    with pytest.raises(sync.SyncError):
+        sync.import_changes(str(bad), a)
+    with pytest.raises(SystemExit, match="Sync error"):
+        ledger_cli.main(["--data", a, "sync-import", str(bad)])
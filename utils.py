@@ -13,18 +13,26 @@ def load_data():
 
 def save_data(df):
     df.to_csv(FILE_NAME, index=False)
+import os
 import pandas as pd
 
 FILE_NAME = "data.csv"
 
-def load_data():
+COLUMNS = [
+    "Date", "Type", "Customer", "Service", "Applications", "Expense", "Income",
+    "Profit", "Payment Status", "Amount Received", "Pending Amount", "Remarks",
+    "Row ID", "Version"
+]
+
+def load_data(file_name=None):
     try:
-        return pd.read_csv(FILE_NAME)
+        return pd.read_csv(file_name or FILE_NAME)
     except FileNotFoundError:
-        return pd.DataFrame(columns=[
-            "Date", "Type", "Customer", "Service", "Applications", "Expense", "Income",
-            "Profit", "Payment Status", "Amount Received", "Pending Amount", "Remarks"
-        ])
+        return pd.DataFrame(columns=COLUMNS)
 
-def save_data(df):
-    df.to_csv(FILE_NAME, index=False)
+def save_data(df, file_name=None):
+    # Written to a new file and swapped in, so a crash never leaves half a
+    # ledger and backups can tell a rewrite from an append
+    path = file_name or FILE_NAME
+    df.to_csv(f"{path}.tmp", index=False)
+    os.replace(f"{path}.tmp", path)